@@ -1,7 +1,29 @@
+import os
+import mmap
+import codecs
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import streamlit as st
-from io import StringIO, BytesIO
-import chardet
+from io import BytesIO
+try:
+    # faust-cchardet: implementación en C, misma API que chardet
+    import cchardet as chardet
+except ImportError:
+    import chardet
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 import plotly.express as px
 
 # Configuración de la página
@@ -12,75 +34,506 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Tamaño de la muestra usada para detectar encoding y delimitador
+SAMPLE_SIZE = 65536
+
+# Función para detectar el encoding a partir de una muestra de bytes
+def detect_encoding(raw_data):
+    if raw_data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    
+    sample = raw_data[:SAMPLE_SIZE]
+    try:
+        # Camino rápido: ASCII/UTF-8 (final=False tolera un carácter cortado al final)
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return chardet.detect(sample)['encoding'] or 'latin1'
+
+# Columnas de texto; se leen siempre como str para que un título como "1942"
+# no se interprete como número
+TEXT_COLS = ['TÍTULO', 'GÉNERO', 'PLATAFORMA', 'DESARROLLADOR']
+
+# Filas por bloque al leer el archivo por defecto
+CHUNK_SIZE = 200_000
+
+# Bytes por segmento del lector paralelo sobre mmap
+SEGMENT_SIZE = 64 << 20
+
+# Bytes por bloque del lector de PyArrow
+ARROW_BLOCK_SIZE = 32 << 20
+
+# Filas a partir de las cuales la máscara de filtros se compila con Numba
+NUMBA_MIN_FILAS = 1_000_000
+
+# Máximo de puntos enviados al gráfico de dispersión
+MAX_PUNTOS_SCATTER = 20_000
+
+# Versión del formato de la copia Parquet; subirla cuando cambie clean_data
+# para que las copias antiguas se descarten
+PARQUET_VERSION = b'1'
+
+# Archivos cuyos datos, metadatos y gráficos se guardan en caché
+MAX_ARCHIVOS_CACHE = 4
+
+# Combinaciones de filtros cuyas estadísticas se guardan en caché
+MAX_DESCRIBE_CACHE = 32
+
+# Exportaciones guardadas en caché (una por formato del archivo actual)
+MAX_EXPORTACIONES = 4
+
+# Delimitadores candidatos para la detección
+DELIMITADORES = b",;\t|"
+
+# Función para detectar el delimitador a partir de una muestra de bytes
+def detect_delimiter(sample):
+    arr = np.frombuffer(sample[:SAMPLE_SIZE], dtype=np.uint8)
+    
+    # Ignorar los bytes entre comillas (paridad acumulada de '"')
+    fuera = np.cumsum(arr == 0x22) % 2 == 0
+    
+    # Separar en filas por los saltos de línea fuera de comillas
+    saltos = np.flatnonzero((arr == 0x0A) & fuera)
+    if saltos.size > 1:
+        # Descartar la última fila, que puede estar cortada por la muestra
+        arr, fuera = arr[:saltos[-1] + 1], fuera[:saltos[-1] + 1]
+        inicios = np.concatenate(([0], saltos[:-1] + 1))
+    else:
+        inicios = np.array([0])
+    
+    presentes = np.bincount(arr[fuera], minlength=256)
+    mejor, mejor_clave = ",", None
+    for c in DELIMITADORES:
+        if presentes[c] == 0:
+            continue
+        # Conteo por fila y moda de ese conteo (tabla de frecuencias de csv.Sniffer)
+        por_fila = np.add.reduceat(((arr == c) & fuera).astype(np.int32), inicios)
+        frecuencias = np.bincount(por_fila)
+        moda = frecuencias.argmax()
+        consistencia = frecuencias[moda] / por_fila.size
+        # Preferir delimitadores consistentes (>= 90% de filas con la moda),
+        # luego más apariciones por fila y, a igualdad, menor varianza
+        clave = (consistencia >= 0.9 and moda > 0, moda, -por_fila.var())
+        if mejor_clave is None or clave > mejor_clave:
+            mejor, mejor_clave = chr(c), clave
+    
+    return mejor
+
 # Función para detectar encoding y delimitador
 def detect_file_properties(file_path):
-    # Detectar encoding
+    # Leer una única muestra del archivo
     with open(file_path, 'rb') as f:
-        result = chardet.detect(f.read(10000))
-    encoding = result['encoding']
+        sample = f.read(SAMPLE_SIZE)
+    
+    # Detectar encoding
+    encoding = detect_encoding(sample)
     
-    # Detectar delimitador
-    with open(file_path, 'r', encoding=encoding) as f:
-        primera_linea = f.readline()
-        delimitador = "," if primera_linea.count(",") > primera_linea.count(";") else ";"
+    # Detectar delimitador sobre la misma muestra
+    delimitador = detect_delimiter(sample)
     
     return encoding, delimitador
 
 # Función para cargar archivos subidos
 def load_uploaded_file(uploaded_file):
-    # Leer como bytes para detectar encoding
+    # Leer como bytes; el contenido sirve como clave de la caché
     raw_data = uploaded_file.getvalue()
     
-    # Detectar encoding
-    result = chardet.detect(raw_data)
-    encoding = result['encoding']
-    
     try:
-        # Intentar decodificar con el encoding detectado
-        string_data = raw_data.decode(encoding)
-        stringio = StringIO(string_data)
-        
-        # Detectar delimitador
-        primera_linea = stringio.readline()
-        delimitador = "," if primera_linea.count(",") > primera_linea.count(";") else ";"
-        stringio.seek(0)  # Rebobinar para leer desde el inicio
-        
-        # Leer el DataFrame
-        df = pd.read_csv(stringio, delimiter=delimitador, on_bad_lines='warn')
+        return _load_bytes(raw_data)
+    except Exception as e:
+        st.error(f"No se pudo decodificar el archivo: {e}")
+        return None
+
+# Parseo del archivo subido, cacheado por el contenido en bytes
+@st.cache_data(show_spinner=False, max_entries=MAX_ARCHIVOS_CACHE)
+def _load_bytes(raw_data):
+    # Detectar encoding y delimitador sobre una muestra acotada
+    encoding = detect_encoding(raw_data)
+    delimitador = detect_delimiter(raw_data)
+    
+    # Camino rápido: lector multihilo de PyArrow directamente sobre los bytes
+    # (ya están en memoria, leer por bloques no ahorraría nada)
+    df = read_csv_arrow(BytesIO(raw_data), encoding, delimitador)
+    if df is not None:
         return df
+    
+    try:
+        # Leer los bytes directamente; pandas decodifica con el encoding detectado
+        # sin crear una copia del archivo como str
+        df = pd.read_csv(BytesIO(raw_data), encoding=encoding, delimiter=delimitador, on_bad_lines='warn',
+                         dtype=dict.fromkeys(TEXT_COLS, str))
+        return clean_data(df)
     except UnicodeDecodeError:
         # Fallback a latin1 si falla
-        try:
-            string_data = raw_data.decode('latin1')
-            stringio = StringIO(string_data)
-            primera_linea = stringio.readline()
-            delimitador = "," if primera_linea.count(",") > primera_linea.count(";") else ";"
-            stringio.seek(0)
-            df = pd.read_csv(stringio, delimiter=delimitador, on_bad_lines='warn')
-            return df
-        except Exception as e:
-            st.error(f"No se pudo decodificar el archivo: {e}")
+        df = pd.read_csv(BytesIO(raw_data), encoding='latin1', delimiter=delimitador, on_bad_lines='warn',
+                         dtype=dict.fromkeys(TEXT_COLS, str))
+        return clean_data(df)
+
+# Función para leer y limpiar un CSV con PyArrow. Por defecto usa el lector
+# multihilo (pacsv.read_csv), que parsea todo el archivo de una vez; con
+# streaming=True usa pacsv.open_csv, que es de un solo hilo pero limpia bloque a
+# bloque y acota la memoria. Devuelve None si PyArrow no está instalado o no
+# puede parsear el archivo (p. ej. tipos que cambian entre bloques); entonces se
+# usa el motor C de pandas
+def read_csv_arrow(source, encoding, delimitador, streaming=False):
+    if pa is None:
+        return None
+    
+    opciones = dict(
+        read_options=pacsv.ReadOptions(encoding=encoding, block_size=ARROW_BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(delimiter=delimitador, invalid_row_handler=_skip_bad_line),
+        convert_options=pacsv.ConvertOptions(
+            strings_can_be_null=True, column_types=dict.fromkeys(TEXT_COLS, pa.string())
+        )
+    )
+    try:
+        if not streaming:
+            tabla = pacsv.read_csv(source, **opciones)
+            return clean_data(tabla.to_pandas(types_mapper=pd.ArrowDtype))
+        
+        reader = pacsv.open_csv(source, **opciones)
+        chunks = []
+        offset = 0
+        for batch in reader:
+            chunk = batch.to_pandas(types_mapper=pd.ArrowDtype)
+            # Numerar las filas de forma continua entre bloques
+            chunk.index += offset
+            offset += len(chunk)
+            chunks.append(clean_data(chunk))
+        if not chunks:
+            chunks.append(clean_data(reader.schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)))
+    except (pa.ArrowInvalid, UnicodeDecodeError):
+        return None
+    
+    return _concat_chunks(chunks)
+
+# Equivalente a on_bad_lines='warn' para el lector de PyArrow: como el motor C de
+# pandas, solo se omiten las filas con campos de más. Una fila con campos de menos
+# hace fallar la lectura para que pandas la complete con nulos
+def _skip_bad_line(row):
+    if row.actual_columns < row.expected_columns:
+        return 'error'
+    # El lector multihilo no conoce el número de línea (row.number es None)
+    linea = f"Línea {row.number}" if row.number is not None else "Línea"
+    warnings.warn(f"{linea} omitida: {row.text}", pd.errors.ParserWarning)
+    return 'skip'
+
+# Función para cargar el archivo por defecto ya limpio (mtime invalida la caché si cambia).
+# Se guarda una copia en Parquet junto al CSV y se reutiliza mientras el CSV no cambie
+@st.cache_data(show_spinner=False, max_entries=MAX_ARCHIVOS_CACHE)
+def load_default_file(archivo, mtime):
+    encoding, delimitador = detect_file_properties(archivo)
+    
+    parquet = os.path.splitext(archivo)[0] + '.parquet'
+    if os.path.exists(parquet) and os.path.getmtime(parquet) >= mtime:
+        df = read_parquet_copy(parquet)
+        if df is not None:
+            return df, encoding, delimitador
+    
+    df = read_csv_arrow(archivo, encoding, delimitador, streaming=True)
+    if df is None and not codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32')):
+        df = read_csv_segments(archivo, encoding, delimitador)
+    if df is None:
+        # Leer y limpiar por bloques para no tener en memoria el CSV completo sin limpiar
+        chunks = [clean_data(chunk) for chunk in pd.read_csv(
+            archivo, encoding=encoding, delimiter=delimitador, on_bad_lines='warn', chunksize=CHUNK_SIZE,
+            dtype=dict.fromkeys(TEXT_COLS, str)
+        )]
+        df = _concat_chunks(chunks)
+    
+    write_parquet_copy(df, parquet)
+    
+    return df, encoding, delimitador
+
+# Función para leer la copia Parquet del archivo por defecto.
+# Devuelve None si no hay pyarrow, si la copia está dañada o si es de otra versión
+def read_parquet_copy(parquet):
+    if pa is None:
+        return None
+    try:
+        tabla = pq.read_table(parquet)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = tabla.schema.metadata or {}
+    if metadata.get(b'version') != PARQUET_VERSION:
+        return None
+    
+    # Recuperar los mismos dtypes que la lectura en frío: ArrowDtype si se leyó
+    # con PyArrow, manteniendo las categorías como pd.Categorical
+    if metadata.get(b'arrow') == b'1':
+        return tabla.to_pandas(
+            types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)
+        )
+    return tabla.to_pandas()
+
+# Función para guardar la copia Parquet del archivo por defecto con su versión.
+# Se escribe en un temporal y se renombra para que otra sesión nunca lea una copia a medias
+def write_parquet_copy(df, parquet):
+    if pa is None:
+        return
+    temporal = None
+    try:
+        tabla = pa.Table.from_pandas(df)
+        arrow = any(isinstance(t, pd.ArrowDtype) for t in df.dtypes)
+        tabla = tabla.replace_schema_metadata({
+            **(tabla.schema.metadata or {}),
+            b'version': PARQUET_VERSION,
+            b'arrow': b'1' if arrow else b'0',
+        })
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(parquet) or '.', suffix='.parquet', delete=False
+        ) as f:
+            temporal = f.name
+            pq.write_table(tabla, f, compression='zstd')
+        os.replace(temporal, parquet)
+    except (OSError, pa.ArrowException):
+        # Directorio de solo lectura o tipos no soportados: se sigue sin copia
+        if temporal is not None and os.path.exists(temporal):
+            os.remove(temporal)
+
+# Función para leer y limpiar un CSV por segmentos en paralelo sobre un mmap.
+# Cada hilo parsea con el motor C un rango de bytes que termina en un salto de
+# línea fuera de comillas; supone un encoding compatible con ASCII.
+# Devuelve None si el archivo no tiene filas de datos o no se puede segmentar
+def read_csv_segments(archivo, encoding, delimitador):
+    nombres = pd.read_csv(archivo, encoding=encoding, delimiter=delimitador, nrows=0).columns
+    
+    with open(archivo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Límites de los segmentos, empezando después de la cabecera
+        limites = []
+        inicio = _fin_de_fila(mm, 0)
+        while 0 < inicio < len(mm):
+            fin = _fin_de_fila(mm, min(inicio + SEGMENT_SIZE, len(mm)), mm[inicio:inicio + SEGMENT_SIZE].count(b'"'))
+            limites.append((inicio, fin))
+            inicio = fin
+        if not limites:
             return None
+        
+        def leer_segmento(limite):
+            segmento = pd.read_csv(BytesIO(mm[limite[0]:limite[1]]), header=None, names=nombres,
+                                   encoding=encoding, delimiter=delimitador, on_bad_lines='warn',
+                                   dtype=dict.fromkeys(TEXT_COLS, str))
+            return len(segmento), clean_data(segmento)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                resultados = list(pool.map(leer_segmento, limites))
+        except pd.errors.ParserError:
+            return None  # Se usa el lector secuencial por bloques
+    
+    # Numerar las filas de forma continua entre segmentos
+    chunks = []
+    offset = 0
+    for filas, chunk in resultados:
+        chunk.index += offset
+        offset += filas
+        chunks.append(chunk)
+    
+    return _concat_chunks(chunks)
+
+# Posición siguiente al primer salto de línea fuera de comillas a partir de
+# `desde`; `comillas` es el número de '"' entre el inicio de la fila y `desde`.
+# Devuelve len(mm) si no hay más saltos de línea
+def _fin_de_fila(mm, desde, comillas=0):
+    dentro = comillas % 2 == 1
+    fin = mm.find(b'\n', desde)
+    while fin != -1:
+        # Paridad de comillas hasta este salto; "" escapadas suman dos y no la cambian
+        dentro ^= mm[desde:fin].count(b'"') % 2 == 1
+        if not dentro:
+            return fin + 1
+        desde = fin
+        fin = mm.find(b'\n', fin + 1)
+    return len(mm)
 
 # Función para limpiar datos
 def clean_data(df):
     # Eliminar duplicados
     df = df.drop_duplicates()
     
-    # Convertir columnas numéricas
+    # Convertir columnas numéricas; los enteros se reducen al tipo más pequeño,
+    # los decimales se mantienen en float64 para no introducir error de redondeo
     numeric_cols = ['AÑO', 'PRECIO', 'MEDIA', 'PUNTUACIÓN']
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            df[col] = pd.to_numeric(df[col], errors='coerce', downcast='integer')
     
-    # Limpiar texto
-    text_cols = ['TÍTULO', 'GÉNERO', 'PLATAFORMA', 'DESARROLLADOR']
-    for col in text_cols:
+    # Limpiar texto en una sola pasada sobre el array subyacente
+    # Columnas de baja cardinalidad que se guardan como categoría (pd.Categorical
+    # infiere las categorías ya ordenadas)
+    category_cols = ['GÉNERO', 'PLATAFORMA', 'DESARROLLADOR']
+    for col in TEXT_COLS:
         if col in df.columns:
-            df[col] = df[col].str.strip().str.upper()
+            if _is_arrow_string(df[col].dtype):
+                # Columnas de PyArrow: kernels vectorizados de libarrow
+                limpios = pc.utf8_upper(pc.utf8_trim_whitespace(pa.array(df[col])))
+                if col in category_cols:
+                    df[col] = pd.Categorical(limpios.to_numpy(zero_copy_only=False))
+                else:
+                    df[col] = pd.Series(limpios, index=df.index, dtype=df[col].dtype)
+                continue
+            
+            valores = [v.strip().upper() if isinstance(v, str)
+                       else None if pd.isna(v) else str(v).strip().upper()
+                       for v in df[col].to_numpy()]
+            if col in category_cols:
+                df[col] = pd.Categorical(valores)
+            else:
+                df[col] = valores
     
     return df
 
+# Indica si una columna es de texto respaldada por PyArrow
+def _is_arrow_string(dtype):
+    return (isinstance(dtype, pd.ArrowDtype)
+            and (pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)))
+
+# Función para unir bloques limpiados por separado
+def _concat_chunks(chunks):
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    # Unificar las categorías para que la concatenación conserve el tipo category
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categorias = sorted(set().union(*(chunk[col].cat.categories for chunk in chunks)))
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categorias)
+    
+    # Los duplicados pueden caer en bloques distintos
+    return pd.concat(chunks).drop_duplicates()
+
+# Metadatos para la barra lateral y los filtros, calculados una vez por archivo
+# (el guion bajo en _df evita que Streamlit lo use en la clave de la caché)
+@st.cache_data(show_spinner=False, max_entries=MAX_ARCHIVOS_CACHE)
+def _metadata(_df, data_key):
+    # Un único recorrido de isnull() para el total y el detalle por columna
+    nulos = _df.isnull().sum()
+    meta = {'nulos': nulos, 'total_nulos': int(nulos.sum())}
+    # Las categorías ya son únicas, ordenadas y sin nulos (ver clean_data)
+    if 'GÉNERO' in _df.columns:
+        meta['generos'] = _df['GÉNERO'].cat.categories.tolist()
+    if 'PLATAFORMA' in _df.columns:
+        meta['plataformas'] = _df['PLATAFORMA'].cat.categories.tolist()
+    if 'AÑO' in _df.columns:
+        meta['año_min'], meta['año_max'] = int(_df['AÑO'].min()), int(_df['AÑO'].max())
+        meta['años_nulos'] = bool(_df['AÑO'].isna().any())
+    if 'PRECIO' in _df.columns:
+        meta['precio_medio'] = float(_df['PRECIO'].mean())
+    return meta
+
+# Máscara de igualdad comparando los códigos enteros de una columna categórica
+def _mask_categoria(serie, valor):
+    return serie.cat.codes.to_numpy() == serie.cat.categories.get_loc(valor)
+
+# Función para construir la máscara de filtros de la pestaña de exploración.
+# Devuelve None si no hay ningún filtro activo
+def build_filter_mask(df, filter_params, meta):
+    genero_activo = 'GÉNERO' in df.columns and filter_params.get('genero', 'Todos') != 'Todos'
+    plataforma_activa = 'PLATAFORMA' in df.columns and filter_params.get('plataforma', 'Todas') != 'Todas'
+    rango = None
+    if 'AÑO' in df.columns:
+        rango = filter_params.get('rango_años', (meta['año_min'], meta['año_max']))
+        # El rango completo solo filtra si hay años nulos que descartar
+        if tuple(rango) == (meta['año_min'], meta['año_max']) and not meta['años_nulos']:
+            rango = None
+    
+    if not (genero_activo or plataforma_activa or rango is not None):
+        return None
+    
+    # Con muchas filas, un único recorrido compilado en lugar de una máscara por filtro.
+    # Los arrays se pasan siempre con los tipos de la firma (int16/float64 contiguos)
+    # para que el núcleo se compile una sola vez y no por cada combinación de filtros
+    if (njit is not None and len(df) >= NUMBA_MIN_FILAS
+            and all(len(df[c].cat.categories) <= np.iinfo(np.int16).max
+                    for c, activo in (('GÉNERO', genero_activo), ('PLATAFORMA', plataforma_activa)) if activo)):
+        sin_codigos = np.empty(0, dtype=np.int16)
+        generos, g = sin_codigos, -1
+        if genero_activo:
+            generos = np.array(df['GÉNERO'].cat.codes, dtype=np.int16)
+            g = df['GÉNERO'].cat.categories.get_loc(filter_params['genero'])
+        plataformas, p = sin_codigos, -1
+        if plataforma_activa:
+            plataformas = np.array(df['PLATAFORMA'].cat.codes, dtype=np.int16)
+            p = df['PLATAFORMA'].cat.categories.get_loc(filter_params['plataforma'])
+        años, y_lo, y_hi = np.empty(0, dtype=np.float64), 0.0, 0.0
+        if rango is not None:
+            años = df['AÑO'].to_numpy(dtype=np.float64, na_value=np.nan)
+            y_lo, y_hi = float(rango[0]), float(rango[1])
+        return _build_mask_numba(len(df), generos, plataformas, años, g, p,
+                                 rango is not None, y_lo, y_hi)
+    
+    condiciones = []
+    if genero_activo:
+        condiciones.append(_mask_categoria(df['GÉNERO'], filter_params['genero']))
+    if plataforma_activa:
+        condiciones.append(_mask_categoria(df['PLATAFORMA'], filter_params['plataforma']))
+    if rango is not None:
+        condiciones.append(df['AÑO'].between(rango[0], rango[1]).to_numpy(dtype=bool, na_value=False))
+    return np.logical_and.reduce(condiciones)
+
+if njit is not None:
+    # Núcleo compilado de build_filter_mask: códigos < 0 o filtrar_años=False
+    # desactivan el filtro correspondiente; los años nulos (NaN) no pasan el rango
+    @njit(parallel=True, cache=True)
+    def _build_mask_numba(n, generos, plataformas, años, g, p, filtrar_años, y_lo, y_hi):
+        out = np.empty(n, np.bool_)
+        for i in prange(n):
+            out[i] = ((g < 0 or generos[i] == g)
+                      and (p < 0 or plataformas[i] == p)
+                      and (not filtrar_años or (años[i] >= y_lo and años[i] <= y_hi)))
+        return out
+
+# Equivalente a value_counts().head(n) contando los códigos con np.bincount
+def _top_categorias(serie, n):
+    codigos = serie.cat.codes.to_numpy()
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(serie.cat.categories))
+    top = np.argsort(-conteos, kind='stable')[:n]
+    top = top[conteos[top] > 0]
+    return pd.Series(conteos[top], index=pd.Index(serie.cat.categories[top], name=serie.name), name='count')
+
+# Estadísticas descriptivas de los datos filtrados, cacheadas por archivo y filtros
+@st.cache_data(show_spinner=False, max_entries=MAX_DESCRIBE_CACHE)
+def _describe(_df_filtrado, data_key, filtros):
+    return _df_filtrado.describe(include='all')
+
+# Gráficos de la pestaña de visualización, construidos una vez por archivo
+@st.cache_data(show_spinner=False, max_entries=MAX_ARCHIVOS_CACHE)
+def _figuras(_df, data_key):
+    figuras = {}
+    if 'GÉNERO' in _df.columns:
+        figuras['generos'] = px.pie(_df, names='GÉNERO', title='Distribución por Género')
+    if 'AÑO' in _df.columns:
+        figuras['años'] = px.histogram(_df, x='AÑO', title='Juegos por Año')
+    if 'PLATAFORMA' in _df.columns:
+        figuras['plataformas'] = px.bar(_top_categorias(_df['PLATAFORMA'], 10),
+                                        title='Top 10 Plataformas')
+    if all(col in _df.columns for col in ['PRECIO', 'MEDIA']):
+        # Muestra acotada: el navegador recibe cada punto como JSON
+        puntos = _df if len(_df) <= MAX_PUNTOS_SCATTER else _df.sample(MAX_PUNTOS_SCATTER, random_state=0)
+        figuras['precio_media'] = px.scatter(puntos, x='PRECIO', y='MEDIA',
+                                             hover_data=['TÍTULO'], title='Precio vs Puntuación')
+    return figuras
+
+# Serialización para la descarga, cacheada por archivo y formato
+@st.cache_data(show_spinner=False, max_entries=MAX_EXPORTACIONES)
+def _exportar(_df, data_key, formato):
+    output = BytesIO()
+    if formato == "CSV":
+        if pa is not None:
+            # Escritor CSV de Arrow (C++), sin bucles de Python por fila
+            pacsv.write_csv(pa.Table.from_pandas(_df, preserve_index=False), output)
+        else:
+            _df.to_csv(output, index=False)
+    elif formato == "Parquet":
+        _df.to_parquet(output, index=False)
+    elif formato == "Excel":
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            _df.to_excel(writer, index=False)
+    elif formato == "JSON":
+        return _df.to_json(orient='records').encode('utf-8')
+    return output.getvalue()
+
 # Interfaz de usuario
 st.title("🎮 Explorador Avanzado de Base de Datos de Videojuegos")
 st.markdown("""
@@ -98,32 +551,35 @@ st.markdown("---")
 uploaded_file = st.file_uploader("Sube tu archivo CSV", type=["csv"])
 if uploaded_file is not None:
     df = load_uploaded_file(uploaded_file)
-    if df is not None:
-        st.success("✅ Archivo cargado correctamente")
+    data_key = uploaded_file.file_id
+    if df is None:
+        st.stop()
+    st.success("✅ Archivo cargado correctamente")
 else:
     # Cargar archivo por defecto si no se sube uno
     try:
         archivo = "base_productos.csv"
-        encoding, delimitador = detect_file_properties(archivo)
-        df = pd.read_csv(archivo, encoding=encoding, delimiter=delimitador, on_bad_lines='warn')
+        data_key = (archivo, os.path.getmtime(archivo))
+        df, encoding, delimitador = load_default_file(*data_key)
         st.success(f"✅ Archivo por defecto cargado correctamente (Encoding: {encoding}, Delimitador: '{delimitador}')")
     except Exception as e:
         st.error(f"❌ Error al cargar el archivo por defecto: {e}")
         st.stop()
 
-# Limpieza de datos
-df = clean_data(df)
+meta = _metadata(df, data_key)
 
 # Sidebar con análisis rápido
 st.sidebar.title("🔍 Análisis Rápido")
 st.sidebar.metric("Total de Juegos", len(df))
 if 'AÑO' in df.columns:
-    st.sidebar.metric("Año más reciente", int(df['AÑO'].max()))
+    st.sidebar.metric("Año más reciente", meta['año_max'])
 if 'PRECIO' in df.columns:
-    st.sidebar.metric("Precio promedio", f"${df['PRECIO'].mean():.2f}")
+    st.sidebar.metric("Precio promedio", f"${meta['precio_medio']:.2f}")
 
 # Pestañas principales
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Resumen", "🔍 Explorar", "📈 Visualización", "💾 Exportar"])
+# (on_change="rerun" permite saber qué pestaña está abierta con .open)
+tab1, tab2, tab3, tab4 = st.tabs(["📊 Resumen", "🔍 Explorar", "📈 Visualización", "💾 Exportar"],
+                                 key="pestaña", on_change="rerun")
 
 with tab1:
     st.subheader("Resumen General")
@@ -134,7 +590,7 @@ with tab1:
     with col2:
         st.metric("Columnas", df.shape[1])
     with col3:
-        st.metric("Valores faltantes", df.isnull().sum().sum())
+        st.metric("Valores faltantes", meta['total_nulos'])
     
     st.subheader("Estructura de Datos")
     st.dataframe(df.head(10), use_container_width=True)
@@ -142,9 +598,9 @@ with tab1:
     expander = st.expander("📝 Detalles Técnicos")
     with expander:
         st.write("**Tipos de datos:**")
-        st.write(df.dtypes)
+        st.write(df.dtypes.astype(str))
         st.write("**Valores nulos por columna:**")
-        st.write(df.isnull().sum())
+        st.write(meta['nulos'])
 
 with tab2:
     st.subheader("Exploración Interactiva")
@@ -155,86 +611,85 @@ with tab2:
     
     with cols[0]:
         if 'GÉNERO' in df.columns:
-            generos = ['Todos'] + sorted(df['GÉNERO'].dropna().unique().tolist())
+            generos = ['Todos'] + meta['generos']
             filter_params['genero'] = st.selectbox("Filtrar por género:", generos)
     
     with cols[1]:
         if 'PLATAFORMA' in df.columns:
-            plataformas = ['Todas'] + sorted(df['PLATAFORMA'].dropna().unique().tolist())
+            plataformas = ['Todas'] + meta['plataformas']
             filter_params['plataforma'] = st.selectbox("Filtrar por plataforma:", plataformas)
     
     with cols[2]:
         if 'AÑO' in df.columns:
-            año_min, año_max = int(df['AÑO'].min()), int(df['AÑO'].max())
+            año_min, año_max = meta['año_min'], meta['año_max']
             filter_params['rango_años'] = st.slider("Rango de años:", año_min, año_max, (año_min, año_max))
     
-    # Aplicar filtros
-    df_filtrado = df.copy()
-    if 'GÉNERO' in df.columns and filter_params.get('genero', 'Todos') != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['GÉNERO'] == filter_params['genero']]
-    if 'PLATAFORMA' in df.columns and filter_params.get('plataforma', 'Todas') != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['PLATAFORMA'] == filter_params['plataforma']]
-    if 'AÑO' in df.columns:
-        rango = filter_params.get('rango_años', (df['AÑO'].min(), df['AÑO'].max()))
-        df_filtrado = df_filtrado[(df_filtrado['AÑO'] >= rango[0]) & (df_filtrado['AÑO'] <= rango[1])]
+    # Aplicar filtros con una única máscara booleana; sin filtros activos se
+    # reutiliza df tal cual (solo se lee, no hace falta copiarlo)
+    mask = build_filter_mask(df, filter_params, meta)
+    df_filtrado = df if mask is None else df.loc[mask]
     
     st.dataframe(df_filtrado, use_container_width=True)
     
-    if st.checkbox("Mostrar estadísticas descriptivas"):
-        st.write(df_filtrado.describe(include='all'))
+    # Cálculo bajo demanda; las combinaciones de filtros ya vistas salen de la caché
+    if st.button("Calcular estadísticas descriptivas"):
+        st.write(_describe(df_filtrado, data_key, tuple(filter_params.items())))
 
 with tab3:
     st.subheader("Visualización de Datos")
     
-    col1, col2 = st.columns(2)
-    with col1:
-        if 'GÉNERO' in df.columns:
-            fig = px.pie(df, names='GÉNERO', title='Distribución por Género')
-            st.plotly_chart(fig, use_container_width=True)
-    with col2:
-        if 'AÑO' in df.columns:
-            fig = px.histogram(df, x='AÑO', title='Juegos por Año')
-            st.plotly_chart(fig, use_container_width=True)
-    
-    col3, col4 = st.columns(2)
-    with col3:
-        if 'PLATAFORMA' in df.columns:
-            fig = px.bar(df['PLATAFORMA'].value_counts().head(10), 
-                        title='Top 10 Plataformas')
-            st.plotly_chart(fig, use_container_width=True)
-    with col4:
-        if all(col in df.columns for col in ['PRECIO', 'MEDIA']):
-            fig = px.scatter(df, x='PRECIO', y='MEDIA', 
-                            hover_data=['TÍTULO'], title='Precio vs Puntuación')
-            st.plotly_chart(fig, use_container_width=True)
+    # Los gráficos solo se construyen cuando la pestaña está abierta
+    if tab3.open:
+        figuras = _figuras(df, data_key)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if 'generos' in figuras:
+                st.plotly_chart(figuras['generos'], use_container_width=True)
+        with col2:
+            if 'años' in figuras:
+                st.plotly_chart(figuras['años'], use_container_width=True)
+        
+        col3, col4 = st.columns(2)
+        with col3:
+            if 'plataformas' in figuras:
+                st.plotly_chart(figuras['plataformas'], use_container_width=True)
+        with col4:
+            if 'precio_media' in figuras:
+                st.plotly_chart(figuras['precio_media'], use_container_width=True)
 
 with tab4:
     st.subheader("Exportar Datos")
     
     # Opciones de exportación
-    export_format = st.radio("Formato de exportación:", ["CSV", "Excel", "JSON"])
+    export_format = st.radio("Formato de exportación:", ["CSV", "Parquet (recomendado)", "Excel", "JSON"])
     
+    # Los datos se serializan al pulsar el botón, no en cada recarga
     if export_format == "CSV":
         st.download_button(
             label="Descargar como CSV",
-            data=df.to_csv(index=False).encode('utf-8'),
+            data=lambda: _exportar(df, data_key, "CSV"),
             file_name='videojuegos_limpio.csv',
             mime='text/csv'
         )
+    elif export_format == "Parquet (recomendado)":
+        st.download_button(
+            label="Descargar como Parquet",
+            data=lambda: _exportar(df, data_key, "Parquet"),
+            file_name='videojuegos_limpio.parquet',
+            mime='application/vnd.apache.parquet'
+        )
     elif export_format == "Excel":
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False)
         st.download_button(
             label="Descargar como Excel",
-            data=output.getvalue(),
+            data=lambda: _exportar(df, data_key, "Excel"),
             file_name='videojuegos_limpio.xlsx',
             mime='application/vnd.ms-excel'
         )
     elif export_format == "JSON":
         st.download_button(
             label="Descargar como JSON",
-            data=df.to_json(orient='records').encode('utf-8'),
+            data=lambda: _exportar(df, data_key, "JSON"),
             file_name='videojuegos_limpio.json',
             mime='application/json'
         )